@@ -4,38 +4,42 @@ Professional-grade inventory management system with past transaction entry
 """
 
 import sqlite3
-import pandas as pd
+import atexit
+import heapq
+import importlib.util
 import os
-import shutil
+import sys
+import time
 import traceback
 import json
 from datetime import datetime, date, timedelta
 from collections import defaultdict
+from functools import lru_cache
 
 # Try to import rich for beautiful interface
 try:
-    from rich.console import Console
+    from rich.console import Console, Group
     from rich.table import Table
     from rich.prompt import Prompt, Confirm
     from rich.panel import Panel
     from rich import box
-    RICH_AVAILABLE = True
     console = Console()
 except ImportError:
-    RICH_AVAILABLE = False
-    print("Installing rich library for better interface...")
-    os.system("pip install rich matplotlib")
-    print("Please restart the program.")
-    exit()
+    print("This program needs the 'rich' library.")
+    print("Install the dependencies with: pip install -r requirements.txt")
+    sys.exit(1)
 
-# Try to import matplotlib for charts
-try:
-    import matplotlib.pyplot as plt
+# matplotlib is slow to import, so it is only loaded when a chart is drawn
+CHARTS_AVAILABLE = importlib.util.find_spec('matplotlib') is not None
+OPENPYXL_AVAILABLE = importlib.util.find_spec('openpyxl') is not None
+
+@lru_cache(maxsize=1)
+def load_pyplot():
+    """Import matplotlib.pyplot on first use."""
     import matplotlib
     matplotlib.use('Agg')  # Non-interactive backend
-    CHARTS_AVAILABLE = True
-except ImportError:
-    CHARTS_AVAILABLE = False
+    import matplotlib.pyplot as plt
+    return plt
 
 # Configuration
 DB_NAME = 'inventory.db'
@@ -43,6 +47,26 @@ CONFIG_FILE = 'config.json'
 ERROR_LOG = 'error_log.txt'
 USER_FILE = 'user_config.txt'
 
+# Backups are skipped while the last one is recent and few rows have changed
+BACKUP_INTERVAL_SECONDS = 300
+BACKUP_EVERY_CHANGES = 100
+
+# Error log handle, opened on the first error and kept for the session
+_ERR_FH = None
+
+def log_error(error_msg):
+    """Logs errors to a file for debugging."""
+    global _ERR_FH
+    if _ERR_FH is None:
+        _ERR_FH = open(ERROR_LOG, 'a', buffering=1)  # Line-buffered
+        atexit.register(_ERR_FH.close)
+    
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    _ERR_FH.write(f"\n[{timestamp}] {error_msg}\n")
+    # Only inside an except block is there a traceback worth recording
+    if sys.exc_info()[0] is not None:
+        _ERR_FH.write(traceback.format_exc())
+
 # Default configuration
 DEFAULT_CONFIG = {
     "low_stock_threshold": 10,
@@ -82,186 +106,387 @@ def save_config(config):
 # Load configuration
 CONFIG = load_config()
 
-def log_error(error_msg):
-    """Logs errors to a file for debugging."""
-    with open(ERROR_LOG, 'a') as f:
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        f.write(f"\n[{timestamp}] {error_msg}\n")
-        f.write(traceback.format_exc())
+# Username is read (or prompted for) once per session
+_CACHED_USER = None
 
 def get_user_name():
     """Gets username for audit trail."""
+    global _CACHED_USER
+    if _CACHED_USER is not None:
+        return _CACHED_USER
+    
     if not os.path.exists(USER_FILE):
-        if RICH_AVAILABLE:
-            name = Prompt.ask("Enter your name (for record-keeping)", default="Admin")
-        else:
-            name = input("Enter your name (for record-keeping): ").strip() or "Admin"
+        name = Prompt.ask("Enter your name (for record-keeping)", default="Admin")
         with open(USER_FILE, 'w') as f:
             f.write(name)
-        return name
     else:
         with open(USER_FILE, 'r') as f:
-            return f.read().strip()
+            name = f.read().strip()
+    
+    _CACHED_USER = name
+    return name
+
+# Applied after lower(), so 'X' is already 'x' by then
+_NORMALIZE_TABLE = str.maketrans({'*': 'x', ' ': None})
 
+@lru_cache(maxsize=512)
 def normalize_dimension(dimension):
     """Standardizes dimension format to prevent typos creating duplicates."""
-    dimension = dimension.strip().lower()
-    dimension = dimension.replace('*', 'x').replace('X', 'x').replace(' ', '')
-    return dimension
+    return dimension.strip().lower().translate(_NORMALIZE_TABLE)
+
+# Per-connection SQLite tuning (journal_mode=WAL is persistent, set in init_database)
+PRAGMAS = '''
+    PRAGMA synchronous = NORMAL;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA cache_size = -20000;
+    PRAGMA mmap_size = 268435456;
+    PRAGMA busy_timeout = 5000;
+'''
+
+def open_conn():
+    """Open a database connection with the standard PRAGMAs applied."""
+    conn = sqlite3.connect(DB_NAME, isolation_level=None)
+    conn.executescript(PRAGMAS)
+    return conn
+
+# One connection for the whole session; sqlite3 caches prepared statements
+# per connection, keyed on the exact SQL text
+CONN = open_conn()
+
+def optimize_database(conn=CONN):
+    """Refresh query planner statistics that SQLite considers stale."""
+    conn.execute('PRAGMA analysis_limit = 400')
+    conn.execute('PRAGMA optimize')
+
+# atexit runs in reverse order: optimize first, then close
+atexit.register(CONN.close)
+atexit.register(optimize_database)
+
+LATEST_STOCK_STMT = '''
+    SELECT stock_kg
+    FROM current_stock
+    WHERE dimension = ?
+'''
+
+INSERT_SQL = '''
+    INSERT INTO transactions
+    (date, time, user, dimension, action, amount_kg, current_stock_kg,
+     cost_per_kg, sell_per_kg, notes)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+UPSERT_STOCK_SQL = '''
+    INSERT INTO current_stock (dimension, stock_kg, updated_at)
+    VALUES (?, ?, ?)
+    ON CONFLICT(dimension) DO UPDATE SET
+        stock_kg = excluded.stock_kg,
+        updated_at = excluded.updated_at
+'''
 
-def init_database():
+# Staged bulk-entry rows are written once this many are waiting or this
+# many seconds have passed since the last write, whichever comes first
+BULK_FLUSH_ROWS = 20
+BULK_FLUSH_SECONDS = 30
+
+# Dimensions already in the database, used to tell when get_all_dimensions is stale
+_KNOWN_DIMS = set()
+
+# Backup bookkeeping: when the last backup ran, CONN.total_changes and
+# PRAGMA data_version at that point, and the backup file names (listed
+# once per session, unsorted)
+_LAST_BACKUP_TS = 0.0
+_LAST_BACKUP_CHANGES = 0
+_LAST_DATA_VERSION = None
+_BACKUP_FILES = None
+
+
+def init_database(conn=CONN):
     """Initialize SQLite database with required tables."""
-    conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
     
-    # Main transactions table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS transactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT NOT NULL,
-            time TEXT NOT NULL,
-            user TEXT NOT NULL,
-            dimension TEXT NOT NULL,
-            action TEXT NOT NULL,
-            amount_kg REAL NOT NULL,
-            current_stock_kg REAL NOT NULL,
-            cost_per_kg REAL DEFAULT 0,
-            sell_per_kg REAL DEFAULT 0,
-            notes TEXT DEFAULT ''
-        )
-    ''')
-    
-    # Create index for faster queries
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_dimension 
-        ON transactions(dimension)
-    ''')
+    # WAL lets readers run alongside writes and makes commits cheaper
+    cursor.execute('PRAGMA journal_mode = WAL')
     
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_date 
-        ON transactions(date)
-    ''')
+    # Only take the write lock for schema changes when something is missing
+    existing = {row[0] for row in cursor.execute('SELECT name FROM sqlite_master')}
+    schema = {'transactions', 'idx_dimension', 'idx_date', 'idx_dim_id',
+              'idx_action_date', 'current_stock'}
+    if not schema <= existing:
+        cursor.execute('BEGIN IMMEDIATE')
+        
+        # Main transactions table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT NOT NULL,
+                time TEXT NOT NULL,
+                user TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                action TEXT NOT NULL,
+                amount_kg REAL NOT NULL,
+                current_stock_kg REAL NOT NULL,
+                cost_per_kg REAL DEFAULT 0,
+                sell_per_kg REAL DEFAULT 0,
+                notes TEXT DEFAULT ''
+            )
+        ''')
+        
+        # Create index for faster queries
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_dimension 
+            ON transactions(dimension)
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_date 
+            ON transactions(date)
+        ''')
+        
+        # Serves MAX(id) per dimension straight from the index
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_dim_id
+            ON transactions(dimension, id DESC)
+        ''')
+        
+        # Sales/cost reports filter on action plus a date range
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_action_date
+            ON transactions(action, date)
+        ''')
+        
+        # Latest stock per dimension, maintained by add_transaction
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS current_stock (
+                dimension TEXT PRIMARY KEY,
+                stock_kg REAL NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        ''')
+        
+        conn.commit()
+    
+    # Rebuild current_stock from history when it was just created, or when the
+    # newest transaction is not reflected in it (written by an older version
+    # or another tool). Two index lookups, so startup stays flat as history grows
+    consistent = cursor.execute('''
+        SELECT NOT EXISTS (
+            SELECT 1
+            FROM transactions t
+            WHERE t.id = (SELECT MAX(id) FROM transactions)
+              AND NOT EXISTS (
+                  SELECT 1
+                  FROM current_stock c
+                  WHERE c.dimension = t.dimension
+                    AND c.stock_kg = t.current_stock_kg
+              )
+        )
+    ''').fetchone()[0]
+    if 'current_stock' not in existing or not consistent:
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('DELETE FROM current_stock')
+        cursor.execute('''
+            INSERT INTO current_stock (dimension, stock_kg, updated_at)
+            SELECT dimension, current_stock_kg, date || ' ' || time
+            FROM transactions
+            WHERE id IN (
+                SELECT MAX(id)
+                FROM transactions
+                GROUP BY dimension
+            )
+        ''')
+        conn.commit()
     
-    conn.commit()
-    conn.close()
+    get_all_dimensions.cache_clear()
+    _KNOWN_DIMS.clear()
+    _KNOWN_DIMS.update(get_all_dimensions())
     
     # Create backup
     create_backup()
 
-def create_backup():
-    """Creates timestamped backup of database."""
-    if os.path.exists(DB_NAME):
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_name = f'backup_db_{timestamp}.db'
-        shutil.copy(DB_NAME, backup_name)
-        cleanup_old_backups()
+def create_backup(force=False):
+    """Creates timestamped backup of database, throttled by time and change count.
+    
+    force=True skips the throttle, for operations that cannot be undone.
+    """
+    global _LAST_BACKUP_TS, _LAST_BACKUP_CHANGES, _LAST_DATA_VERSION
+    
+    if (not force
+            and time.time() - _LAST_BACKUP_TS < BACKUP_INTERVAL_SECONDS
+            and CONN.total_changes - _LAST_BACKUP_CHANGES < BACKUP_EVERY_CHANGES):
+        return
+    
+    # Nothing to save if neither this connection (total_changes) nor any
+    # other (data_version) has written since the last backup
+    data_version = CONN.execute('PRAGMA data_version').fetchone()[0]
+    if (not force
+            and data_version == _LAST_DATA_VERSION
+            and CONN.total_changes == _LAST_BACKUP_CHANGES):
+        return
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    backup_name = f'backup_db_{timestamp}.db'
+    # Online backup API: a consistent page-level snapshot, WAL included
+    dst = sqlite3.connect(backup_name)
+    try:
+        CONN.backup(dst)
+        # The copy inherits WAL mode; switch it back so restoring it does not
+        # leave -wal/-shm files next to the backups
+        dst.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        dst.close()
+    _LAST_BACKUP_TS = time.time()
+    _LAST_BACKUP_CHANGES = CONN.total_changes
+    _LAST_DATA_VERSION = data_version
+    
+    if _BACKUP_FILES is not None and backup_name not in _BACKUP_FILES:
+        _BACKUP_FILES.append(backup_name)
+    cleanup_old_backups()
 
 def cleanup_old_backups():
     """Keeps only the most recent backups to save space."""
+    global _BACKUP_FILES
     try:
-        backups = sorted([f for f in os.listdir('.') if f.startswith('backup_db_')])
+        if _BACKUP_FILES is None:
+            with os.scandir('.') as entries:
+                _BACKUP_FILES = [e.name for e in entries
+                                 if e.name.startswith('backup_db_') and e.name.endswith('.db')]
+        
         keep = CONFIG['backups_to_keep']
-        if len(backups) > keep:
-            for old_backup in backups[:-keep]:
-                os.remove(old_backup)
+        excess = len(_BACKUP_FILES) - keep
+        if keep > 0 and excess > 0:
+            # Timestamped names sort oldest first; pick just the excess
+            for old_backup in heapq.nsmallest(excess, _BACKUP_FILES):
+                os.unlink(old_backup)
+                _BACKUP_FILES.remove(old_backup)
     except Exception as e:
+        # Re-list from disk next time rather than trust a half-pruned cache
+        _BACKUP_FILES = None
         log_error(f"Error cleaning up backups: {str(e)}")
 
+@lru_cache(maxsize=1)
 def get_all_dimensions():
-    """Get list of all existing dimensions for autocomplete."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute('SELECT DISTINCT dimension FROM transactions ORDER BY dimension')
+    """Get list of all existing dimensions for autocomplete (cached until a new one is added)."""
+    # No conn argument: it would be part of the cache key, so it always reads CONN
+    cursor = CONN.cursor()
+    cursor.execute('SELECT dimension FROM current_stock ORDER BY dimension')
     dimensions = [row[0] for row in cursor.fetchall()]
-    conn.close()
     return dimensions
 
-def autocomplete_dimension(partial):
+def autocomplete_dimension(partial, conn=CONN):
     """Suggest dimensions based on partial input."""
-    dimensions = get_all_dimensions()
-    matches = [d for d in dimensions if d.startswith(partial.lower())]
-    return matches
+    partial = partial.lower()
+    if not partial:
+        return list(get_all_dimensions())
+    
+    # Prefix match as a range scan on the primary key: partial <= d < upper
+    upper = partial[:-1] + chr(ord(partial[-1]) + 1)
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT dimension
+        FROM current_stock
+        WHERE dimension >= ? AND dimension < ?
+        ORDER BY dimension
+    ''', (partial, upper))
+    return [row[0] for row in cursor.fetchall()]
 
 def get_dimension_with_autocomplete(prompt_text):
     """Get dimension input with autocomplete suggestions."""
     dimensions = get_all_dimensions()
     
-    if RICH_AVAILABLE:
-        console.print(f"\n[cyan]{prompt_text}[/cyan]")
-        if dimensions:
-            console.print("[dim]Existing dimensions: " + ", ".join(dimensions[:10]) + 
-                         ("..." if len(dimensions) > 10 else "") + "[/dim]")
-        dimension = Prompt.ask("Dimension")
-    else:
-        print(f"\n{prompt_text}")
-        if dimensions:
-            print(f"Existing: {', '.join(dimensions[:10])}")
-        dimension = input("Dimension: ")
+    console.print(f"\n[cyan]{prompt_text}[/cyan]")
+    if dimensions:
+        console.print("[dim]Existing dimensions: " + ", ".join(dimensions[:10]) + 
+                     ("..." if len(dimensions) > 10 else "") + "[/dim]")
+    dimension = Prompt.ask("Dimension")
     
     dimension = normalize_dimension(dimension)
     
-    # Show suggestions if partial match
-    if dimension and dimension not in dimensions:
+    # Show suggestions if partial match (set lookup rather than a list scan)
+    if dimension and dimension not in _KNOWN_DIMS:
         matches = autocomplete_dimension(dimension)
         if matches:
-            if RICH_AVAILABLE:
-                console.print(f"[yellow]Did you mean: {', '.join(matches)}?[/yellow]")
-            else:
-                print(f"Did you mean: {', '.join(matches)}?")
+            console.print(f"[yellow]Did you mean: {', '.join(matches)}?[/yellow]")
     
     return dimension
 
-def get_current_stock(dimension):
+def get_current_stock(dimension, conn=CONN):
     """Get current stock for a dimension."""
-    conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
-    cursor.execute('''
-        SELECT current_stock_kg 
-        FROM transactions 
-        WHERE dimension = ? 
-        ORDER BY id DESC 
-        LIMIT 1
-    ''', (dimension,))
+    cursor.execute(LATEST_STOCK_STMT, (dimension,))
     result = cursor.fetchone()
-    conn.close()
     return result[0] if result else 0
 
 def add_transaction(dimension, action, amount_kg, current_stock_kg, 
-                   cost_per_kg=0, sell_per_kg=0, notes='', custom_date=None):
+                   cost_per_kg=0, sell_per_kg=0, notes='', custom_date=None, conn=CONN):
     """Add a transaction to the database."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
+    # One clock read, so date and time always agree (even around midnight)
+    now = datetime.now()
     # Use custom date if provided, otherwise use today
-    trans_date = custom_date if custom_date else date.today().strftime(CONFIG['date_format'])
+    trans_date = custom_date if custom_date else now.strftime(CONFIG['date_format'])
+    trans_time = now.strftime('%H:%M:%S')
+    # Make sure the username prompt never runs while the write lock is held
+    user = get_user_name()
     
-    cursor.execute('''
-        INSERT INTO transactions 
-        (date, time, user, dimension, action, amount_kg, current_stock_kg, 
-         cost_per_kg, sell_per_kg, notes)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        trans_date,
-        datetime.now().strftime('%H:%M:%S'),
-        get_user_name(),
-        dimension,
-        action,
-        amount_kg,
-        current_stock_kg,
-        cost_per_kg,
-        sell_per_kg,
-        notes
-    ))
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute(INSERT_SQL, (
+            trans_date,
+            trans_time,
+            user,
+            dimension,
+            action,
+            amount_kg,
+            current_stock_kg,
+            cost_per_kg,
+            sell_per_kg,
+            notes
+        ))
+        conn.execute(UPSERT_STOCK_SQL, (dimension, current_stock_kg, f'{trans_date} {trans_time}'))
+    
+    # Only reached once the commit succeeded
+    if dimension not in _KNOWN_DIMS:
+        _KNOWN_DIMS.add(dimension)
+        get_all_dimensions.cache_clear()
+
+def add_transactions_bulk(rows, conn=CONN):
+    """Add many transactions with executemany in a single database transaction.
+    
+    Each row holds add_transaction() arguments in order, plus the time the
+    entry was made: (dimension, action, amount_kg, current_stock_kg,
+    cost_per_kg, sell_per_kg, notes, custom_date, trans_time). A custom_date
+    or trans_time of None falls back to the time of the write.
+    """
+    if not rows:
+        return
+    
+    now = datetime.now()
+    today = now.strftime(CONFIG['date_format'])
+    now_time = now.strftime('%H:%M:%S')
+    user = get_user_name()
     
-    conn.commit()
-    conn.close()
+    params = [
+        (custom_date or today, trans_time or now_time, user, dimension, action, amount_kg,
+         current_stock_kg, cost_per_kg, sell_per_kg, notes)
+        for (dimension, action, amount_kg, current_stock_kg,
+             cost_per_kg, sell_per_kg, notes, custom_date, trans_time) in rows
+    ]
+    
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.executemany(INSERT_SQL, params)
+        # Applied in order, so each dimension ends on its last staged row
+        conn.executemany(UPSERT_STOCK_SQL, [
+            (p[3], p[6], f'{p[0]} {p[1]}') for p in params
+        ])
+    
+    new_dims = {row[0] for row in rows} - _KNOWN_DIMS
+    if new_dims:
+        _KNOWN_DIMS.update(new_dims)
+        get_all_dimensions.cache_clear()
 
 def add_stock():
     """Records a new stock arrival with cost tracking."""
-    if RICH_AVAILABLE:
-        console.print("\n[bold cyan]📦 Add New Stock[/bold cyan]", style="cyan")
-    else:
-        print("\n--- Add New Stock ---")
+    console.print("\n[bold cyan]📦 Add New Stock[/bold cyan]", style="cyan")
     
     dimension = get_dimension_with_autocomplete("Enter bag dimension (e.g., 10x16)")
     
@@ -270,10 +495,7 @@ def add_stock():
         return
     
     try:
-        if RICH_AVAILABLE:
-            amount = float(Prompt.ask(f"Amount of '{dimension}' received (kg)"))
-        else:
-            amount = float(input(f"Amount of '{dimension}' received (kg): "))
+        amount = float(Prompt.ask(f"Amount of '{dimension}' received (kg)"))
         
         if amount <= 0:
             console.print("[red]❌ Error: Amount must be positive.[/red]")
@@ -286,10 +508,7 @@ def add_stock():
     cost_per_kg = 0
     if CONFIG['enable_profit_tracking']:
         try:
-            if RICH_AVAILABLE:
-                cost_input = Prompt.ask(f"Cost per kg {CONFIG['default_currency']}", default="0")
-            else:
-                cost_input = input(f"Cost per kg {CONFIG['default_currency']} (press Enter to skip): ") or "0"
+            cost_input = Prompt.ask(f"Cost per kg {CONFIG['default_currency']}", default="0")
             cost_per_kg = float(cost_input)
         except ValueError:
             cost_per_kg = 0
@@ -298,40 +517,27 @@ def add_stock():
     new_stock = current_stock + amount
     
     # Confirmation
-    if RICH_AVAILABLE:
-        table = Table(show_header=False, box=box.ROUNDED)
-        table.add_row("Dimension:", f"[cyan]{dimension}[/cyan]")
-        table.add_row("Adding:", f"[green]{amount} kg[/green]")
-        table.add_row("Current stock:", f"{current_stock} kg")
-        table.add_row("New stock:", f"[bold green]{new_stock} kg[/bold green]")
-        if cost_per_kg > 0:
-            table.add_row("Cost:", f"{CONFIG['default_currency']}{cost_per_kg}/kg (Total: {CONFIG['default_currency']}{cost_per_kg * amount})")
-        console.print(table)
-        
-        if not Confirm.ask("Is this correct?", default=True):
-            console.print("[yellow]❌ Operation cancelled.[/yellow]")
-            return
-    else:
-        print(f"\nDimension: {dimension}")
-        print(f"Adding: {amount} kg")
-        print(f"Current: {current_stock} kg → New: {new_stock} kg")
-        if input("Correct? (yes/no): ").lower() not in ['yes', 'y']:
-            return
+    table = Table(show_header=False, box=box.ROUNDED)
+    table.add_row("Dimension:", f"[cyan]{dimension}[/cyan]")
+    table.add_row("Adding:", f"[green]{amount} kg[/green]")
+    table.add_row("Current stock:", f"{current_stock} kg")
+    table.add_row("New stock:", f"[bold green]{new_stock} kg[/bold green]")
+    if cost_per_kg > 0:
+        table.add_row("Cost:", f"{CONFIG['default_currency']}{cost_per_kg}/kg (Total: {CONFIG['default_currency']}{cost_per_kg * amount})")
+    console.print(table)
+    
+    if not Confirm.ask("Is this correct?", default=True):
+        console.print("[yellow]❌ Operation cancelled.[/yellow]")
+        return
     
     create_backup()
     add_transaction(dimension, 'Stock Added', amount, new_stock, cost_per_kg=cost_per_kg)
     
-    if RICH_AVAILABLE:
-        console.print(f"\n[bold green]✅ Success![/bold green] Stock for '{dimension}' is now {new_stock:.2f} kg")
-    else:
-        print(f"\n✅ Success! Stock for '{dimension}' is now {new_stock:.2f} kg")
+    console.print(f"\n[bold green]✅ Success![/bold green] Stock for '{dimension}' is now {new_stock:.2f} kg")
 
 def record_sale():
     """Records a sale with profit tracking."""
-    if RICH_AVAILABLE:
-        console.print("\n[bold cyan]💰 Record a Sale[/bold cyan]")
-    else:
-        print("\n--- Record a Sale ---")
+    console.print("\n[bold cyan]💰 Record a Sale[/bold cyan]")
     
     dimension = get_dimension_with_autocomplete("Enter bag dimension sold")
     
@@ -345,16 +551,10 @@ def record_sale():
         console.print(f"[red]❌ ERROR: No stock available for '{dimension}'![/red]")
         return
     
-    if RICH_AVAILABLE:
-        console.print(f"[cyan]Current stock for '{dimension}': {current_stock} kg[/cyan]")
-    else:
-        print(f"Current stock: {current_stock} kg")
+    console.print(f"[cyan]Current stock for '{dimension}': {current_stock} kg[/cyan]")
     
     try:
-        if RICH_AVAILABLE:
-            amount = float(Prompt.ask("Amount sold (kg)"))
-        else:
-            amount = float(input("Amount sold (kg): "))
+        amount = float(Prompt.ask("Amount sold (kg)"))
         
         if amount <= 0:
             console.print("[red]❌ Error: Amount must be positive.[/red]")
@@ -372,10 +572,7 @@ def record_sale():
     sell_per_kg = 0
     if CONFIG['enable_profit_tracking']:
         try:
-            if RICH_AVAILABLE:
-                sell_input = Prompt.ask(f"Selling price per kg {CONFIG['default_currency']}", default="0")
-            else:
-                sell_input = input(f"Selling price per kg {CONFIG['default_currency']} (press Enter to skip): ") or "0"
+            sell_input = Prompt.ask(f"Selling price per kg {CONFIG['default_currency']}", default="0")
             sell_per_kg = float(sell_input)
         except ValueError:
             sell_per_kg = 0
@@ -383,172 +580,137 @@ def record_sale():
     new_stock = current_stock - amount
     
     # Confirmation
-    if RICH_AVAILABLE:
-        table = Table(show_header=False, box=box.ROUNDED)
-        table.add_row("Dimension:", f"[cyan]{dimension}[/cyan]")
-        table.add_row("Selling:", f"[yellow]{amount} kg[/yellow]")
-        table.add_row("Current stock:", f"{current_stock} kg")
-        table.add_row("Remaining:", f"[bold]{new_stock} kg[/bold]")
-        if sell_per_kg > 0:
-            table.add_row("Revenue:", f"{CONFIG['default_currency']}{sell_per_kg}/kg (Total: {CONFIG['default_currency']}{sell_per_kg * amount})")
-        console.print(table)
-        
-        if not Confirm.ask("Is this correct?", default=True):
-            console.print("[yellow]❌ Operation cancelled.[/yellow]")
-            return
-    else:
-        print(f"\nDimension: {dimension}")
-        print(f"Selling: {amount} kg")
-        print(f"Current: {current_stock} kg → Remaining: {new_stock} kg")
-        if input("Correct? (yes/no): ").lower() not in ['yes', 'y']:
-            return
+    table = Table(show_header=False, box=box.ROUNDED)
+    table.add_row("Dimension:", f"[cyan]{dimension}[/cyan]")
+    table.add_row("Selling:", f"[yellow]{amount} kg[/yellow]")
+    table.add_row("Current stock:", f"{current_stock} kg")
+    table.add_row("Remaining:", f"[bold]{new_stock} kg[/bold]")
+    if sell_per_kg > 0:
+        table.add_row("Revenue:", f"{CONFIG['default_currency']}{sell_per_kg}/kg (Total: {CONFIG['default_currency']}{sell_per_kg * amount})")
+    console.print(table)
+    
+    if not Confirm.ask("Is this correct?", default=True):
+        console.print("[yellow]❌ Operation cancelled.[/yellow]")
+        return
     
     create_backup()
     add_transaction(dimension, 'Sale', -amount, new_stock, sell_per_kg=sell_per_kg)
     
-    if RICH_AVAILABLE:
-        console.print(f"\n[bold green]✅ Success![/bold green] Stock for '{dimension}' is now {new_stock:.2f} kg")
-        
-        # Low stock warning
-        if new_stock < CONFIG['low_stock_threshold'] and new_stock > 0:
-            console.print(f"[yellow]⚠️ WARNING: Low stock! Only {new_stock:.2f} kg remaining.[/yellow]")
-    else:
-        print(f"\n✅ Success! Stock: {new_stock:.2f} kg")
+    console.print(f"\n[bold green]✅ Success![/bold green] Stock for '{dimension}' is now {new_stock:.2f} kg")
+    
+    # Low stock warning
+    if new_stock < CONFIG['low_stock_threshold'] and new_stock > 0:
+        console.print(f"[yellow]⚠️ WARNING: Low stock! Only {new_stock:.2f} kg remaining.[/yellow]")
 
 def add_past_transaction_manual():
     """Manually enter a past transaction one at a time - user friendly!"""
-    if RICH_AVAILABLE:
-        console.print("\n[bold cyan]⏰ Add Past Transaction[/bold cyan]")
-        console.print("[dim]Enter historical transactions one by one[/dim]\n")
-    else:
-        print("\n--- Add Past Transaction ---")
+    console.print("\n[bold cyan]⏰ Add Past Transaction[/bold cyan]")
+    console.print("[dim]Enter historical transactions one by one[/dim]\n")
     
-    # Step 1: Select transaction type
-    if RICH_AVAILABLE:
+    while True:
+        # Step 1: Select transaction type
         console.print("[bold]What type of transaction?[/bold]")
         console.print("  [green]1.[/green] Stock Added (received inventory)")
         console.print("  [yellow]2.[/yellow] Sale (sold to customer)")
         console.print("  [cyan]3.[/cyan] Adjustment (correction)")
         
         trans_type = Prompt.ask("Choose transaction type", choices=['1','2','3'])
-    else:
-        print("\nTransaction Type:")
-        print("1. Stock Added")
-        print("2. Sale")
-        print("3. Adjustment")
-        trans_type = input("Choice [1]: ").strip() or '1'
-    
-    # Map choice to action
-    if trans_type == '1':
-        action = 'Stock Added'
-        action_color = 'green'
-        action_symbol = '+'
-    elif trans_type == '2':
-        action = 'Sale'
-        action_color = 'yellow'
-        action_symbol = '-'
-    else:
-        action = 'Adjustment'
-        action_color = 'cyan'
-        action_symbol = '±'
-    
-    # Step 2: Get date
-    if RICH_AVAILABLE:
+        
+        # Map choice to action
+        if trans_type == '1':
+            action = 'Stock Added'
+            action_color = 'green'
+            action_symbol = '+'
+        elif trans_type == '2':
+            action = 'Sale'
+            action_color = 'yellow'
+            action_symbol = '-'
+        else:
+            action = 'Adjustment'
+            action_color = 'cyan'
+            action_symbol = '±'
+        
+        # Step 2: Get date
         console.print(f"\n[bold]When did this {action.lower()} occur?[/bold]")
         custom_date = Prompt.ask("Enter date (YYYY-MM-DD)", 
                                 default=date.today().strftime('%Y-%m-%d'))
-    else:
-        print(f"\nDate of {action}:")
-        custom_date = input(f"Enter date (YYYY-MM-DD) [{date.today().strftime('%Y-%m-%d')}]: ") or date.today().strftime('%Y-%m-%d')
-    
-    # Validate date
-    try:
-        date_obj = datetime.strptime(custom_date, '%Y-%m-%d')
-        if date_obj > datetime.now():
-            console.print("[red]❌ Cannot enter future dates![/red]")
+        
+        # Validate date
+        try:
+            date_obj = date.fromisoformat(custom_date)
+            if date_obj > date.today():
+                console.print("[red]❌ Cannot enter future dates![/red]")
+                return
+            # Newer Pythons accept other ISO spellings; store YYYY-MM-DD
+            custom_date = date_obj.isoformat()
+        except ValueError:
+            console.print("[red]❌ Invalid date format. Use YYYY-MM-DD[/red]")
             return
-    except ValueError:
-        console.print("[red]❌ Invalid date format. Use YYYY-MM-DD[/red]")
-        return
-    
-    # Step 3: Get dimension
-    dimension = get_dimension_with_autocomplete(f"Enter bag dimension for this {action.lower()}")
-    
-    if not dimension:
-        console.print("[red]❌ Dimension cannot be empty.[/red]")
-        return
-    
-    # Step 4: Get amount
-    try:
-        if RICH_AVAILABLE:
+        
+        # Step 3: Get dimension
+        dimension = get_dimension_with_autocomplete(f"Enter bag dimension for this {action.lower()}")
+        
+        if not dimension:
+            console.print("[red]❌ Dimension cannot be empty.[/red]")
+            return
+        
+        # Step 4: Get amount
+        try:
             if action == 'Sale':
                 amount = float(Prompt.ask(f"Amount sold (kg)", default="0"))
             elif action == 'Stock Added':
                 amount = float(Prompt.ask(f"Amount received (kg)", default="0"))
             else:
                 amount = float(Prompt.ask(f"Adjustment amount (use + or - for direction)", default="0"))
-        else:
-            amount = float(input(f"Amount (kg): ") or "0")
-        
-        if amount == 0:
-            console.print("[red]❌ Amount cannot be zero.[/red]")
+            
+            if amount == 0:
+                console.print("[red]❌ Amount cannot be zero.[/red]")
+                return
+        except ValueError:
+            console.print("[red]❌ Invalid amount.[/red]")
             return
-    except ValueError:
-        console.print("[red]❌ Invalid amount.[/red]")
-        return
-    
-    # Step 5: Get pricing info
-    cost_per_kg = 0
-    sell_per_kg = 0
-    
-    if CONFIG['enable_profit_tracking']:
-        if action == 'Stock Added':
-            try:
-                if RICH_AVAILABLE:
-                    cost_input = Prompt.ask(f"Cost per kg {CONFIG['default_currency']} (optional)", default="0")
-                else:
-                    cost_input = input(f"Cost per kg {CONFIG['default_currency']} [0]: ") or "0"
-                cost_per_kg = float(cost_input)
-            except ValueError:
-                cost_per_kg = 0
         
-        elif action == 'Sale':
-            try:
-                if RICH_AVAILABLE:
+        # Step 5: Get pricing info
+        cost_per_kg = 0
+        sell_per_kg = 0
+        
+        if CONFIG['enable_profit_tracking']:
+            if action == 'Stock Added':
+                try:
+                    cost_input = Prompt.ask(f"Cost per kg {CONFIG['default_currency']} (optional)", default="0")
+                    cost_per_kg = float(cost_input)
+                except ValueError:
+                    cost_per_kg = 0
+            
+            elif action == 'Sale':
+                try:
                     sell_input = Prompt.ask(f"Selling price per kg {CONFIG['default_currency']} (optional)", default="0")
-                else:
-                    sell_input = input(f"Selling price per kg {CONFIG['default_currency']} [0]: ") or "0"
-                sell_per_kg = float(sell_input)
-            except ValueError:
-                sell_per_kg = 0
-    
-    # Step 6: Get notes
-    if RICH_AVAILABLE:
+                    sell_per_kg = float(sell_input)
+                except ValueError:
+                    sell_per_kg = 0
+        
+        # Step 6: Get notes
         notes = Prompt.ask("Notes (optional)", default="")
-    else:
-        notes = input("Notes (optional): ").strip()
-    
-    # Step 7: Calculate new stock
-    current_stock = get_current_stock(dimension)
-    
-    if action == 'Stock Added':
-        new_stock = current_stock + abs(amount)
-        amount_signed = abs(amount)
-    elif action == 'Sale':
-        amount_signed = -abs(amount)
-        new_stock = current_stock + amount_signed
-        if new_stock < 0:
-            console.print(f"[yellow]⚠️ Warning: This will result in negative stock ({new_stock:.2f} kg)[/yellow]")
-            if RICH_AVAILABLE:
+        
+        # Step 7: Calculate new stock
+        current_stock = get_current_stock(dimension)
+        
+        if action == 'Stock Added':
+            new_stock = current_stock + abs(amount)
+            amount_signed = abs(amount)
+        elif action == 'Sale':
+            amount_signed = -abs(amount)
+            new_stock = current_stock + amount_signed
+            if new_stock < 0:
+                console.print(f"[yellow]⚠️ Warning: This will result in negative stock ({new_stock:.2f} kg)[/yellow]")
                 if not Confirm.ask("Continue anyway?", default=False):
                     console.print("[yellow]❌ Transaction cancelled.[/yellow]")
                     return
-    else:  # Adjustment
-        amount_signed = amount
-        new_stock = current_stock + amount
-    
-    # Step 8: Show summary and confirm
-    if RICH_AVAILABLE:
+        else:  # Adjustment
+            amount_signed = amount
+            new_stock = current_stock + amount
+        
+        # Step 8: Show summary and confirm
         console.print("\n[bold]Transaction Summary:[/bold]")
         
         table = Table(show_header=False, box=box.ROUNDED, border_style=action_color)
@@ -575,245 +737,230 @@ def add_past_transaction_manual():
         if not Confirm.ask("\nIs this correct?", default=True):
             console.print("[yellow]❌ Transaction cancelled.[/yellow]")
             return
-    else:
-        print(f"\nSummary:")
-        print(f"Date: {custom_date}")
-        print(f"Type: {action}")
-        print(f"Dimension: {dimension}")
-        print(f"Amount: {action_symbol}{abs(amount):.2f} kg")
-        print(f"Stock: {current_stock:.2f} kg → {new_stock:.2f} kg")
-        if input("\nConfirm? (yes/no): ").lower() not in ['yes', 'y']:
-            return
-    
-    # Step 9: Save transaction
-    create_backup()
-    add_transaction(dimension, action, amount_signed, new_stock, 
-                   cost_per_kg, sell_per_kg, notes, custom_date)
-    
-    if RICH_AVAILABLE:
+        
+        # Step 9: Save transaction
+        create_backup()
+        add_transaction(dimension, action, amount_signed, new_stock, 
+                       cost_per_kg, sell_per_kg, notes, custom_date)
+        
         console.print(f"\n[bold green]✅ Past transaction recorded successfully![/bold green]")
         console.print(f"[dim]Date: {custom_date} | {dimension}: {new_stock:.2f} kg[/dim]")
         
         # Ask if they want to add another
         console.print()
-        if Confirm.ask("Add another past transaction?", default=False):
-            add_past_transaction_manual()
-    else:
-        print(f"\n✅ Transaction recorded for {custom_date}")
+        if not Confirm.ask("Add another past transaction?", default=False):
+            break
 
 def bulk_entry_wizard():
     """Guide user through entering multiple past transactions easily."""
-    if RICH_AVAILABLE:
-        console.print("\n[bold cyan]📋 Bulk Entry Wizard[/bold cyan]")
-        console.print("[dim]Enter multiple past transactions quickly[/dim]\n")
-        console.print("[yellow]Tip: Have your records ready (dates, amounts, prices, etc.)[/yellow]\n")
-        
-        # Ask if user wants to include pricing
-        include_pricing = False
-        if CONFIG['enable_profit_tracking']:
-            include_pricing = Confirm.ask("Include pricing information?", default=True)
-    else:
-        print("\n--- Bulk Entry Wizard ---")
-        include_pricing = False
-        if CONFIG['enable_profit_tracking']:
-            include_pricing = input("Include pricing? (y/n) [y]: ").lower() in ['', 'y', 'yes']
+    console.print("\n[bold cyan]📋 Bulk Entry Wizard[/bold cyan]")
+    console.print("[dim]Enter multiple past transactions quickly[/dim]\n")
+    console.print("[yellow]Tip: Have your records ready (dates, amounts, prices, etc.)[/yellow]\n")
+    
+    # Ask if user wants to include pricing
+    include_pricing = False
+    if CONFIG['enable_profit_tracking']:
+        include_pricing = Confirm.ask("Include pricing information?", default=True)
     
     transactions_added = 0
     
-    while True:
-        if RICH_AVAILABLE:
-            console.print(f"\n[bold]Transaction #{transactions_added + 1}[/bold]")
-        else:
-            print(f"\n--- Transaction #{transactions_added + 1} ---")
-        
-        # Quick entry mode
+    # Confirmed entries are staged and written with add_transactions_bulk;
+    # pending_stock carries running stock for rows not yet written
+    pending = []
+    pending_stock = {}
+    last_flush = time.monotonic()
+    
+    def flush():
+        """Write staged rows; on failure keep them staged and report it."""
+        nonlocal last_flush
         try:
-            # Get all info quickly
-            if RICH_AVAILABLE:
-                date_input = Prompt.ask("Date (YYYY-MM-DD)", default=date.today().strftime('%Y-%m-%d'))
-            else:
-                date_input = input(f"Date (YYYY-MM-DD) [{date.today().strftime('%Y-%m-%d')}]: ") or date.today().strftime('%Y-%m-%d')
-            
-            # Validate date
-            datetime.strptime(date_input, '%Y-%m-%d')
-            
-            dimension = get_dimension_with_autocomplete("Dimension")
-            if not dimension:
-                break
+            add_transactions_bulk(pending)
+        except Exception as e:
+            log_error(f"Bulk entry save failed ({len(pending)} entries kept): {str(e)}")
+            console.print(f"[red]Could not save {len(pending)} entries yet: {str(e)}[/red]")
+            return False
+        pending.clear()
+        last_flush = time.monotonic()
+        return True
+    
+    create_backup()
+    try:
+        while True:
+            console.print(f"\n[bold]Transaction #{transactions_added + 1}[/bold]")
             
-            if RICH_AVAILABLE:
+            # Quick entry mode
+            try:
+                # Get all info quickly
+                date_input = Prompt.ask("Date (YYYY-MM-DD)", default=date.today().strftime('%Y-%m-%d'))
+                
+                # Validate date and store it as YYYY-MM-DD
+                date_input = date.fromisoformat(date_input).isoformat()
+                
+                dimension = get_dimension_with_autocomplete("Dimension")
+                if not dimension:
+                    break
+                
                 trans_type = Prompt.ask("Type (stock/sale/adjust)", 
                                       choices=['stock', 'sale', 'adjust'])
-            else:
-                trans_type = input("Type (stock/sale/adjust): ").lower()
-            
-            if trans_type not in ['stock', 'sale', 'adjust']:
-                console.print("[red]Invalid type[/red]")
-                continue
-            
-            amount = float(input("Amount (kg): "))
-            
-            # Get pricing if enabled
-            cost_per_kg = 0
-            sell_per_kg = 0
-            
-            if include_pricing:
+                
+                if trans_type not in ['stock', 'sale', 'adjust']:
+                    console.print("[red]Invalid type[/red]")
+                    continue
+                
+                amount = float(input("Amount (kg): "))
+                
+                # Get pricing if enabled
+                cost_per_kg = 0
+                sell_per_kg = 0
+                
+                if include_pricing:
+                    if trans_type == 'stock':
+                        try:
+                            cost_input = input(f"Cost per kg {CONFIG['default_currency']} [0]: ") or "0"
+                            cost_per_kg = float(cost_input)
+                        except ValueError:
+                            cost_per_kg = 0
+                    elif trans_type == 'sale':
+                        try:
+                            sell_input = input(f"Sell price per kg {CONFIG['default_currency']} [0]: ") or "0"
+                            sell_per_kg = float(sell_input)
+                        except ValueError:
+                            sell_per_kg = 0
+                
+                # Map type
                 if trans_type == 'stock':
-                    try:
-                        cost_input = input(f"Cost per kg {CONFIG['default_currency']} [0]: ") or "0"
-                        cost_per_kg = float(cost_input)
-                    except ValueError:
-                        cost_per_kg = 0
+                    action = 'Stock Added'
+                    amount_signed = abs(amount)
                 elif trans_type == 'sale':
-                    try:
-                        sell_input = input(f"Sell price per kg {CONFIG['default_currency']} [0]: ") or "0"
-                        sell_per_kg = float(sell_input)
-                    except ValueError:
-                        sell_per_kg = 0
-            
-            # Map type
-            if trans_type == 'stock':
-                action = 'Stock Added'
-                amount_signed = abs(amount)
-            elif trans_type == 'sale':
-                action = 'Sale'
-                amount_signed = -abs(amount)
-            else:
-                action = 'Adjustment'
-                amount_signed = amount
-            
-            # Calculate stock
-            current_stock = get_current_stock(dimension)
-            new_stock = current_stock + amount_signed
-            
-            # Quick confirm with pricing info
-            summary = f"→ {date_input} | {dimension} | {action} | {amount_signed:+.2f}kg | Stock: {new_stock:.2f}kg"
-            if cost_per_kg > 0:
-                summary += f" | Cost: {CONFIG['default_currency']}{cost_per_kg}/kg"
-            if sell_per_kg > 0:
-                summary += f" | Price: {CONFIG['default_currency']}{sell_per_kg}/kg"
-            
-            print(summary)
-            
-            if RICH_AVAILABLE:
+                    action = 'Sale'
+                    amount_signed = -abs(amount)
+                else:
+                    action = 'Adjustment'
+                    amount_signed = amount
+                
+                # Calculate stock
+                if dimension in pending_stock:
+                    current_stock = pending_stock[dimension]
+                else:
+                    current_stock = get_current_stock(dimension)
+                new_stock = current_stock + amount_signed
+                
+                # Quick confirm with pricing info
+                summary = f"→ {date_input} | {dimension} | {action} | {amount_signed:+.2f}kg | Stock: {new_stock:.2f}kg"
+                if cost_per_kg > 0:
+                    summary += f" | Cost: {CONFIG['default_currency']}{cost_per_kg}/kg"
+                if sell_per_kg > 0:
+                    summary += f" | Price: {CONFIG['default_currency']}{sell_per_kg}/kg"
+                
+                print(summary)
+                
                 confirm = Confirm.ask("OK?", default=True)
-            else:
-                confirm = input("OK? (y/n) [y]: ").lower() in ['', 'y', 'yes']
+                
+                if confirm:
+                    # Stamp the row now; it may only be written at the next flush
+                    pending.append((dimension, action, amount_signed, new_stock,
+                                    cost_per_kg, sell_per_kg, "Bulk entry", date_input,
+                                    datetime.now().strftime('%H:%M:%S')))
+                    pending_stock[dimension] = new_stock
+                    transactions_added += 1
+                    if (len(pending) >= BULK_FLUSH_ROWS
+                            or time.monotonic() - last_flush >= BULK_FLUSH_SECONDS):
+                        flush()
+                    console.print(f"[green]✅ Added ({transactions_added} total)[/green]")
+                else:
+                    console.print("[yellow]⏭️ Skipped[/yellow]")
             
-            if confirm:
-                create_backup()
-                add_transaction(dimension, action, amount_signed, new_stock, 
-                              cost_per_kg=cost_per_kg, sell_per_kg=sell_per_kg, 
-                              notes="Bulk entry", custom_date=date_input)
-                transactions_added += 1
-                console.print(f"[green]✅ Added ({transactions_added} total)[/green]")
-            else:
-                console.print("[yellow]⏭️ Skipped[/yellow]")
-        
-        except KeyboardInterrupt:
-            console.print("\n[yellow]Bulk entry interrupted[/yellow]")
-            break
-        except Exception as e:
-            console.print(f"[red]Error: {str(e)}[/red]")
-            continue
-        
-        # Continue?
-        if RICH_AVAILABLE:
-            if not Confirm.ask("\nAdd another?", default=True):
+            except KeyboardInterrupt:
+                console.print("\n[yellow]Bulk entry interrupted[/yellow]")
                 break
-        else:
-            if input("\nAdd another? (y/n) [y]: ").lower() not in ['', 'y', 'yes']:
+            except Exception as e:
+                console.print(f"[red]Error: {str(e)}[/red]")
+                continue
+            
+            # Continue?
+            if not Confirm.ask("\nAdd another?", default=True):
                 break
+    finally:
+        # Entries the user confirmed are saved even if the wizard is interrupted
+        if pending and not flush():
+            transactions_added -= len(pending)
+            console.print(f"[red]❌ {len(pending)} entries were not saved. "
+                          f"See error_log.txt and enter them again.[/red]")
+    
+    if transactions_added:
+        optimize_database()
     
     console.print(f"\n[bold green]✅ Bulk entry complete! Added {transactions_added} transactions.[/bold green]")
 
-def view_inventory():
+def view_inventory(conn=CONN):
     """Display current inventory with rich formatting."""
-    conn = sqlite3.connect(DB_NAME)
-    
     # Get current stock for each dimension
     query = '''
-        SELECT dimension, current_stock_kg
-        FROM transactions t1
-        WHERE id = (
-            SELECT MAX(id) 
-            FROM transactions t2 
-            WHERE t2.dimension = t1.dimension
-        )
+        SELECT dimension, stock_kg
+        FROM current_stock
         ORDER BY dimension
     '''
     
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    rows = conn.execute(query).fetchall()
     
-    if df.empty:
+    if not rows:
         console.print("\n[yellow]Inventory is empty.[/yellow]")
         return
     
-    if RICH_AVAILABLE:
-        table = Table(title="📦 Current Inventory", box=box.DOUBLE_EDGE)
-        table.add_column("Dimension", style="cyan")
-        table.add_column("Stock (kg)", justify="right", style="green")
-        table.add_column("Status", justify="center")
-        
-        total = 0
-        for _, row in df.iterrows():
-            stock = row['current_stock_kg']
-            total += stock
-            
-            if stock == 0:
-                status = "[red]OUT OF STOCK[/red]"
-                stock_str = "[red]0.00[/red]"
-            elif stock < CONFIG['low_stock_threshold']:
-                status = "[yellow]⚠️ LOW[/yellow]"
-                stock_str = f"[yellow]{stock:.2f}[/yellow]"
-            else:
-                status = "[green]✓ OK[/green]"
-                stock_str = f"[green]{stock:.2f}[/green]"
-            
-            table.add_row(row['dimension'], stock_str, status)
+    table = Table(title="📦 Current Inventory", box=box.DOUBLE_EDGE)
+    table.add_column("Dimension", style="cyan")
+    table.add_column("Stock (kg)", justify="right", style="green")
+    table.add_column("Status", justify="center")
+    
+    total = 0
+    for dimension, stock in rows:
+        total += stock
         
-        table.add_section()
-        table.add_row("[bold]TOTAL[/bold]", f"[bold]{total:.2f}[/bold]", "")
+        if stock == 0:
+            status = "[red]OUT OF STOCK[/red]"
+            stock_str = "[red]0.00[/red]"
+        elif stock < CONFIG['low_stock_threshold']:
+            status = "[yellow]⚠️ LOW[/yellow]"
+            stock_str = f"[yellow]{stock:.2f}[/yellow]"
+        else:
+            status = "[green]✓ OK[/green]"
+            stock_str = f"[green]{stock:.2f}[/green]"
         
-        console.print(table)
-    else:
-        print("\n--- Current Inventory ---")
-        for _, row in df.iterrows():
-            print(f"{row['dimension']}: {row['current_stock_kg']:.2f} kg")
+        table.add_row(dimension, stock_str, status)
+    
+    table.add_section()
+    table.add_row("[bold]TOTAL[/bold]", f"[bold]{total:.2f}[/bold]", "")
+    
+    console.print(table)
 
-def generate_stock_chart():
+def generate_stock_chart(conn=CONN):
     """Generate a bar chart of current stock levels."""
     if not CHARTS_AVAILABLE:
         console.print("[yellow]Chart generation not available. Install matplotlib.[/yellow]")
         return
     
-    conn = sqlite3.connect(DB_NAME)
-    
     query = '''
-        SELECT dimension, current_stock_kg
-        FROM transactions t1
-        WHERE id = (
-            SELECT MAX(id) 
-            FROM transactions t2 
-            WHERE t2.dimension = t1.dimension
-        )
-        ORDER BY current_stock_kg DESC
+        SELECT dimension, stock_kg
+        FROM current_stock
+        ORDER BY stock_kg DESC
     '''
     
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    rows = conn.execute(query).fetchall()
     
-    if df.empty:
+    if not rows:
         console.print("[yellow]No data available for chart.[/yellow]")
         return
     
+    plt = load_pyplot()
+    dimensions = [row[0] for row in rows]
+    stocks = [row[1] for row in rows]
+    
     # Create chart
     plt.figure(figsize=(12, 6))
     colors = ['red' if x == 0 else 'orange' if x < CONFIG['low_stock_threshold'] else 'green' 
-              for x in df['current_stock_kg']]
+              for x in stocks]
     
-    plt.bar(df['dimension'], df['current_stock_kg'], color=colors)
+    plt.bar(dimensions, stocks, color=colors)
     plt.xlabel('Bag Dimension')
     plt.ylabel('Stock (kg)')
     plt.title('Current Stock Levels')
@@ -821,7 +968,8 @@ def generate_stock_chart():
     plt.axhline(y=CONFIG['low_stock_threshold'], color='orange', linestyle='--', 
                 label=f'Low Stock Threshold ({CONFIG["low_stock_threshold"]} kg)')
     plt.legend()
-    plt.tight_layout()
+    # Fixed margins: tight_layout() costs an extra draw pass before saving
+    plt.subplots_adjust(left=0.07, right=0.98, top=0.93, bottom=0.2)
     
     filename = f'stock_chart_{date.today().strftime("%Y%m%d")}.png'
     plt.savefig(filename, dpi=150)
@@ -831,11 +979,8 @@ def generate_stock_chart():
 
 def stock_adjustment():
     """Manual stock adjustment for corrections."""
-    if RICH_AVAILABLE:
-        console.print("\n[bold yellow]⚙️ Stock Adjustment[/bold yellow]")
-        console.print("[dim]Use this to correct stock levels based on physical count[/dim]")
-    else:
-        print("\n--- Stock Adjustment ---")
+    console.print("\n[bold yellow]⚙️ Stock Adjustment[/bold yellow]")
+    console.print("[dim]Use this to correct stock levels based on physical count[/dim]")
     
     dimension = get_dimension_with_autocomplete("Enter dimension to adjust")
     
@@ -844,12 +989,8 @@ def stock_adjustment():
     
     current_stock = get_current_stock(dimension)
     
-    if RICH_AVAILABLE:
-        console.print(f"[cyan]Current stock in system: {current_stock} kg[/cyan]")
-        actual_stock = float(Prompt.ask("Enter actual stock (from physical count)"))
-    else:
-        print(f"Current stock: {current_stock} kg")
-        actual_stock = float(input("Actual stock (kg): "))
+    console.print(f"[cyan]Current stock in system: {current_stock} kg[/cyan]")
+    actual_stock = float(Prompt.ask("Enter actual stock (from physical count)"))
     
     difference = actual_stock - current_stock
     
@@ -858,37 +999,27 @@ def stock_adjustment():
         return
     
     # Confirmation
-    if RICH_AVAILABLE:
-        console.print(f"\n[yellow]Adjustment needed: {difference:+.2f} kg[/yellow]")
-        notes = Prompt.ask("Reason for adjustment", default="Physical count correction")
-        
-        if not Confirm.ask("Apply this adjustment?", default=True):
-            console.print("[yellow]Adjustment cancelled.[/yellow]")
-            return
-    else:
-        print(f"\nAdjustment: {difference:+.2f} kg")
-        notes = input("Reason: ") or "Physical count correction"
-        if input("Apply? (yes/no): ").lower() not in ['yes', 'y']:
-            return
+    console.print(f"\n[yellow]Adjustment needed: {difference:+.2f} kg[/yellow]")
+    notes = Prompt.ask("Reason for adjustment", default="Physical count correction")
+    
+    if not Confirm.ask("Apply this adjustment?", default=True):
+        console.print("[yellow]Adjustment cancelled.[/yellow]")
+        return
     
     create_backup()
     add_transaction(dimension, 'Adjustment', difference, actual_stock, notes=notes)
     
     console.print(f"[green]✅ Stock adjusted. New level: {actual_stock} kg[/green]")
 
-def view_item_history():
+def view_item_history(conn=CONN):
     """View complete transaction history for a specific dimension."""
-    if RICH_AVAILABLE:
-        console.print("\n[bold cyan]📜 View Item History[/bold cyan]")
-    else:
-        print("\n--- View Item History ---")
+    console.print("\n[bold cyan]📜 View Item History[/bold cyan]")
     
     dimension = get_dimension_with_autocomplete("Enter dimension to view history")
     
     if not dimension:
         return
     
-    conn = sqlite3.connect(DB_NAME)
     query = '''
         SELECT date, time, user, action, amount_kg, current_stock_kg, 
                cost_per_kg, sell_per_kg, notes
@@ -898,345 +1029,314 @@ def view_item_history():
         LIMIT 50
     '''
     
-    df = pd.read_sql_query(query, conn, params=(dimension,))
-    conn.close()
+    rows = conn.execute(query, (dimension,)).fetchall()
     
-    if df.empty:
+    if not rows:
         console.print(f"[yellow]No history found for '{dimension}'[/yellow]")
         return
     
-    if RICH_AVAILABLE:
-        table = Table(title=f"Transaction History for: {dimension}", box=box.DOUBLE_EDGE)
-        table.add_column("Date", style="cyan")
-        table.add_column("Time", style="dim")
-        table.add_column("User", style="blue")
-        table.add_column("Action", style="yellow")
-        table.add_column("Amount (kg)", justify="right")
-        table.add_column("New Stock", justify="right", style="green")
-        table.add_column("Value", justify="right")
+    table = Table(title=f"Transaction History for: {dimension}", box=box.DOUBLE_EDGE)
+    table.add_column("Date", style="cyan")
+    table.add_column("Time", style="dim")
+    table.add_column("User", style="blue")
+    table.add_column("Action", style="yellow")
+    table.add_column("Amount (kg)", justify="right")
+    table.add_column("New Stock", justify="right", style="green")
+    table.add_column("Value", justify="right")
+    
+    for (trans_date, trans_time, user, action, amount_kg, stock_kg,
+         cost_per_kg, sell_per_kg, _notes) in rows:
+        action_color = "green" if action == "Stock Added" else "yellow" if action == "Sale" else "cyan"
+        amount_str = f"{amount_kg:+.2f}" if amount_kg >= 0 else f"{amount_kg:.2f}"
         
-        for _, row in df.iterrows():
-            action_color = "green" if row['action'] == "Stock Added" else "yellow" if row['action'] == "Sale" else "cyan"
-            amount_str = f"{row['amount_kg']:+.2f}" if row['amount_kg'] >= 0 else f"{row['amount_kg']:.2f}"
-            
-            # Calculate value
-            value = ""
-            if row['action'] == "Stock Added" and row['cost_per_kg'] > 0:
-                value = f"{CONFIG['default_currency']}{abs(row['amount_kg']) * row['cost_per_kg']:.2f}"
-            elif row['action'] == "Sale" and row['sell_per_kg'] > 0:
-                value = f"{CONFIG['default_currency']}{abs(row['amount_kg']) * row['sell_per_kg']:.2f}"
-            
-            table.add_row(
-                row['date'],
-                row['time'],
-                row['user'],
-                f"[{action_color}]{row['action']}[/{action_color}]",
-                amount_str,
-                f"{row['current_stock_kg']:.2f}",
-                value
-            )
+        # Calculate value
+        value = ""
+        if action == "Stock Added" and cost_per_kg > 0:
+            value = f"{CONFIG['default_currency']}{abs(amount_kg) * cost_per_kg:.2f}"
+        elif action == "Sale" and sell_per_kg > 0:
+            value = f"{CONFIG['default_currency']}{abs(amount_kg) * sell_per_kg:.2f}"
         
-        console.print(table)
-        console.print(f"\n[dim]Showing last 50 transactions for {dimension} (sorted by date)[/dim]")
-    else:
-        print(f"\nTransaction History for: {dimension}")
-        print(df.to_string(index=False))
+        table.add_row(
+            trans_date,
+            trans_time,
+            user,
+            f"[{action_color}]{action}[/{action_color}]",
+            amount_str,
+            f"{stock_kg:.2f}",
+            value
+        )
+    
+    console.print(Group(
+        table,
+        f"\n[dim]Showing last 50 transactions for {dimension} (sorted by date)[/dim]"
+    ))
 
 def get_date_range():
     """Get date range from user for filtered reports."""
-    if RICH_AVAILABLE:
-        console.print("\n[bold cyan]📅 Select Date Range[/bold cyan]")
-        console.print("1. Last 7 Days")
-        console.print("2. Last 30 Days")
-        console.print("3. This Month")
-        console.print("4. This Year")
-        console.print("5. All Time")
-        console.print("6. Custom Range")
-        
-        choice = Prompt.ask("Choose", choices=['1','2','3','4','5','6'], default='2')
-    else:
-        print("\n--- Select Date Range ---")
-        print("1. Last 7 Days")
-        print("2. Last 30 Days")
-        print("3. This Month")
-        print("4. This Year")
-        print("5. All Time")
-        print("6. Custom Range")
-        choice = input("Choice [2]: ").strip() or '2'
+    console.print("\n[bold cyan]📅 Select Date Range[/bold cyan]")
+    console.print("1. Last 7 Days")
+    console.print("2. Last 30 Days")
+    console.print("3. This Month")
+    console.print("4. This Year")
+    console.print("5. All Time")
+    console.print("6. Custom Range")
+    
+    choice = Prompt.ask("Choose", choices=['1','2','3','4','5','6'], default='2')
     
+    fmt = CONFIG['date_format']
     today = date.today()
+    today_str = today.strftime(fmt)
     
     if choice == '1':
-        start_date = (today - timedelta(days=7)).strftime(CONFIG['date_format'])
-        end_date = today.strftime(CONFIG['date_format'])
+        start_date = (today - timedelta(days=7)).strftime(fmt)
+        end_date = today_str
         label = "Last 7 Days"
     elif choice == '2':
-        start_date = (today - timedelta(days=30)).strftime(CONFIG['date_format'])
-        end_date = today.strftime(CONFIG['date_format'])
+        start_date = (today - timedelta(days=30)).strftime(fmt)
+        end_date = today_str
         label = "Last 30 Days"
     elif choice == '3':
-        start_date = today.replace(day=1).strftime(CONFIG['date_format'])
-        end_date = today.strftime(CONFIG['date_format'])
+        start_date = today.replace(day=1).strftime(fmt)
+        end_date = today_str
         label = "This Month"
     elif choice == '4':
-        start_date = today.replace(month=1, day=1).strftime(CONFIG['date_format'])
-        end_date = today.strftime(CONFIG['date_format'])
+        start_date = today.replace(month=1, day=1).strftime(fmt)
+        end_date = today_str
         label = "This Year"
     elif choice == '5':
         start_date = '1900-01-01'
-        end_date = today.strftime(CONFIG['date_format'])
+        end_date = today_str
         label = "All Time"
     else:  # Custom
-        if RICH_AVAILABLE:
-            start_date = Prompt.ask("Start date (YYYY-MM-DD)")
-            end_date = Prompt.ask("End date (YYYY-MM-DD)")
-        else:
-            start_date = input("Start date (YYYY-MM-DD): ")
-            end_date = input("End date (YYYY-MM-DD): ")
+        start_date = Prompt.ask("Start date (YYYY-MM-DD)")
+        end_date = Prompt.ask("End date (YYYY-MM-DD)")
         label = f"{start_date} to {end_date}"
     
     return start_date, end_date, label
 
-def sales_and_profit_reports():
+def sales_and_profit_reports(conn=CONN):
     """Comprehensive sales and profit reports with date filtering."""
     start_date, end_date, label = get_date_range()
     
-    conn = sqlite3.connect(DB_NAME)
-    
-    # Sales summary
-    sales_query = '''
-        SELECT dimension, 
-               SUM(ABS(amount_kg)) as total_sold,
-               SUM(ABS(amount_kg) * sell_per_kg) as revenue
+    # Sales and purchase cost per dimension in one pass over the period
+    report_query = '''
+        SELECT dimension,
+               SUM(CASE WHEN action = 'Sale' THEN ABS(amount_kg) END) as total_sold,
+               SUM(CASE WHEN action = 'Sale' THEN ABS(amount_kg) * sell_per_kg END) as revenue,
+               SUM(CASE WHEN action = 'Stock Added' AND cost_per_kg > 0
+                        THEN ABS(amount_kg) * cost_per_kg END) as cost
         FROM transactions
-        WHERE action = 'Sale' AND date >= ? AND date <= ?
+        WHERE action IN ('Sale', 'Stock Added') AND date >= ? AND date <= ?
         GROUP BY dimension
         ORDER BY total_sold DESC
     '''
     
-    sales_df = pd.read_sql_query(sales_query, conn, params=(start_date, end_date))
-    
-    # Cost summary
-    cost_query = '''
-        SELECT SUM(ABS(amount_kg) * cost_per_kg) as total_cost
-        FROM transactions
-        WHERE action = 'Stock Added' AND date >= ? AND date <= ? AND cost_per_kg > 0
-    '''
-    
-    cost_result = pd.read_sql_query(cost_query, conn, params=(start_date, end_date))
-    total_cost = cost_result['total_cost'].iloc[0] if not cost_result.empty else 0
+    report_rows = conn.execute(report_query, (start_date, end_date)).fetchall()
+    total_cost = sum(cost for _, _, _, cost in report_rows if cost)
     
-    # Calculate sales velocity for the period
-    velocity_query = '''
-        SELECT dimension, SUM(ABS(amount_kg)) as total_sold
-        FROM transactions
-        WHERE action = 'Sale' AND date >= ? AND date <= ?
-        GROUP BY dimension
-    '''
+    # Dimensions with sales in the period (also drives the velocity table)
+    sales_rows = [(dimension, sold, revenue) for dimension, sold, revenue, _ in report_rows
+                  if sold is not None]
     
-    velocity_df = pd.read_sql_query(velocity_query, conn, params=(start_date, end_date))
+    # Current stock for every dimension in one read, for the forecast
+    stocks = dict(conn.execute('SELECT dimension, stock_kg FROM current_stock').fetchall())
     
-    conn.close()
+    # Collect every section and print the report in one go
+    items = [f"\n[bold cyan]📊 Sales & Profit Report: {label}[/bold cyan]"]
     
-    if RICH_AVAILABLE:
-        console.print(f"\n[bold cyan]📊 Sales & Profit Report: {label}[/bold cyan]")
+    if sales_rows:
+        # Sales by dimension
+        table = Table(title="Sales by Dimension", box=box.ROUNDED)
+        table.add_column("Dimension", style="cyan")
+        table.add_column("Sold (kg)", justify="right", style="yellow")
+        table.add_column("Revenue", justify="right", style="green")
+        
+        total_sold = 0
+        total_revenue = 0
         
-        if not sales_df.empty:
-            # Sales by dimension
-            table = Table(title="Sales by Dimension", box=box.ROUNDED)
-            table.add_column("Dimension", style="cyan")
-            table.add_column("Sold (kg)", justify="right", style="yellow")
-            table.add_column("Revenue", justify="right", style="green")
+        for dimension, sold, revenue in sales_rows:
+            total_sold += sold
+            total_revenue += revenue if revenue else 0
             
-            total_sold = 0
-            total_revenue = 0
+            table.add_row(
+                dimension,
+                f"{sold:.2f}",
+                f"{CONFIG['default_currency']}{revenue:.2f}" if revenue else "-"
+            )
+        
+        table.add_section()
+        table.add_row("[bold]TOTAL[/bold]", f"[bold]{total_sold:.2f}[/bold]", 
+                     f"[bold]{CONFIG['default_currency']}{total_revenue:.2f}[/bold]")
+        
+        items.append(table)
+        
+        # Profit summary
+        if CONFIG['enable_profit_tracking'] and (total_cost > 0 or total_revenue > 0):
+            profit = total_revenue - total_cost
+            margin = (profit / total_revenue * 100) if total_revenue > 0 else 0
             
-            for _, row in sales_df.iterrows():
-                total_sold += row['total_sold']
-                total_revenue += row['revenue'] if row['revenue'] else 0
-                
-                table.add_row(
-                    row['dimension'],
-                    f"{row['total_sold']:.2f}",
-                    f"{CONFIG['default_currency']}{row['revenue']:.2f}" if row['revenue'] else "-"
-                )
+            profit_table = Table(title="Profit Summary", box=box.DOUBLE_EDGE)
+            profit_table.add_column("Metric", style="cyan")
+            profit_table.add_column("Amount", justify="right", style="green")
             
-            table.add_section()
-            table.add_row("[bold]TOTAL[/bold]", f"[bold]{total_sold:.2f}[/bold]", 
-                         f"[bold]{CONFIG['default_currency']}{total_revenue:.2f}[/bold]")
+            profit_table.add_row("Total Cost", f"{CONFIG['default_currency']}{total_cost:.2f}")
+            profit_table.add_row("Total Revenue", f"{CONFIG['default_currency']}{total_revenue:.2f}")
+            profit_table.add_section()
             
-            console.print(table)
+            profit_color = "green" if profit >= 0 else "red"
+            profit_table.add_row(
+                "[bold]Net Profit[/bold]", 
+                f"[bold {profit_color}]{CONFIG['default_currency']}{profit:.2f}[/bold {profit_color}]"
+            )
+            profit_table.add_row("Profit Margin", f"{margin:.1f}%")
             
-            # Profit summary
-            if CONFIG['enable_profit_tracking'] and (total_cost > 0 or total_revenue > 0):
-                profit = total_revenue - total_cost
-                margin = (profit / total_revenue * 100) if total_revenue > 0 else 0
-                
-                profit_table = Table(title="Profit Summary", box=box.DOUBLE_EDGE)
-                profit_table.add_column("Metric", style="cyan")
-                profit_table.add_column("Amount", justify="right", style="green")
-                
-                profit_table.add_row("Total Cost", f"{CONFIG['default_currency']}{total_cost:.2f}")
-                profit_table.add_row("Total Revenue", f"{CONFIG['default_currency']}{total_revenue:.2f}")
-                profit_table.add_section()
-                
-                profit_color = "green" if profit >= 0 else "red"
-                profit_table.add_row(
-                    "[bold]Net Profit[/bold]", 
-                    f"[bold {profit_color}]{CONFIG['default_currency']}{profit:.2f}[/bold {profit_color}]"
-                )
-                profit_table.add_row("Profit Margin", f"{margin:.1f}%")
-                
-                console.print(profit_table)
+            items.append(profit_table)
+        
+        # Sales velocity & forecast
+        # Calculate number of days in period
+        fmt = CONFIG['date_format']
+        days_in_period = (datetime.strptime(end_date, fmt) - datetime.strptime(start_date, fmt)).days + 1
+        
+        velocity_table = Table(title="Sales Velocity & Forecast", box=box.ROUNDED)
+        velocity_table.add_column("Dimension", style="cyan")
+        velocity_table.add_column("Avg/Day", justify="right")
+        velocity_table.add_column("Current Stock", justify="right")
+        velocity_table.add_column("Days Left", justify="right")
+        
+        for dimension, total_sold, _ in sales_rows:
+            avg_per_day = total_sold / days_in_period if days_in_period > 0 else 0
+            current_stock = stocks.get(dimension, 0.0)
             
-            # Sales velocity & forecast
-            if not velocity_df.empty:
-                # Calculate number of days in period
-                start_dt = datetime.strptime(start_date, CONFIG['date_format'])
-                end_dt = datetime.strptime(end_date, CONFIG['date_format'])
-                days_in_period = (end_dt - start_dt).days + 1
-                
-                velocity_table = Table(title="Sales Velocity & Forecast", box=box.ROUNDED)
-                velocity_table.add_column("Dimension", style="cyan")
-                velocity_table.add_column("Avg/Day", justify="right")
-                velocity_table.add_column("Current Stock", justify="right")
-                velocity_table.add_column("Days Left", justify="right")
-                
-                for _, row in velocity_df.iterrows():
-                    dimension = row['dimension']
-                    total_sold = row['total_sold']
-                    avg_per_day = total_sold / days_in_period if days_in_period > 0 else 0
-                    current_stock = get_current_stock(dimension)
-                    
-                    if avg_per_day > 0:
-                        days_remaining = current_stock / avg_per_day
-                        
-                        if days_remaining < 7:
-                            forecast = f"[red]{days_remaining:.0f}[/red]"
-                        elif days_remaining < 14:
-                            forecast = f"[yellow]{days_remaining:.0f}[/yellow]"
-                        else:
-                            forecast = f"[green]{days_remaining:.0f}[/green]"
-                    else:
-                        forecast = "[dim]-[/dim]"
-                    
-                    velocity_table.add_row(
-                        dimension,
-                        f"{avg_per_day:.2f}",
-                        f"{current_stock:.2f}",
-                        forecast
-                    )
+            if avg_per_day > 0:
+                days_remaining = current_stock / avg_per_day
                 
-                console.print(velocity_table)
-        else:
-            console.print(f"[yellow]No sales data for {label}[/yellow]")
+                if days_remaining < 7:
+                    forecast = f"[red]{days_remaining:.0f}[/red]"
+                elif days_remaining < 14:
+                    forecast = f"[yellow]{days_remaining:.0f}[/yellow]"
+                else:
+                    forecast = f"[green]{days_remaining:.0f}[/green]"
+            else:
+                forecast = "[dim]-[/dim]"
+            
+            velocity_table.add_row(
+                dimension,
+                f"{avg_per_day:.2f}",
+                f"{current_stock:.2f}",
+                forecast
+            )
+        
+        items.append(velocity_table)
     else:
-        print(f"\n--- Sales & Profit Report: {label} ---")
-        if not sales_df.empty:
-            print(sales_df.to_string(index=False))
+        items.append(f"[yellow]No sales data for {label}[/yellow]")
+    
+    console.print(Group(*items))
 
-def undo_last_transaction():
+def undo_last_transaction(conn=CONN):
     """Undo the last transaction with confirmation."""
-    conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
     
-    # Get last transaction
-    cursor.execute('SELECT * FROM transactions ORDER BY id DESC LIMIT 1')
+    # Get last transaction (a single step down the rowid b-tree)
+    cursor.execute('''
+        SELECT id, date, time, user, dimension, action, amount_kg, current_stock_kg, notes
+        FROM transactions
+        ORDER BY id DESC
+        LIMIT 1
+    ''')
     last = cursor.fetchone()
     
     if not last:
         console.print("\n[yellow]No transactions to undo.[/yellow]")
-        conn.close()
         return
     
     # Parse transaction details
     trans_id, trans_date, trans_time, trans_user, dimension, action, amount_kg, \
-    current_stock, cost_per_kg, sell_per_kg, notes = last
+    current_stock, notes = last
     
-    if RICH_AVAILABLE:
-        console.print("\n[bold red]⚠️ UNDO LAST TRANSACTION[/bold red]")
-        
-        table = Table(box=box.HEAVY_EDGE, border_style="red")
-        table.add_column("Field", style="yellow")
-        table.add_column("Value", style="white")
-        
-        table.add_row("Date", f"{trans_date} {trans_time}")
-        table.add_row("User", trans_user)
-        table.add_row("Dimension", dimension)
-        table.add_row("Action", action)
-        table.add_row("Amount", f"{amount_kg:+.2f} kg")
-        table.add_row("Stock After", f"{current_stock:.2f} kg")
-        if notes:
-            table.add_row("Notes", notes)
-        
-        console.print(table)
-        console.print("\n[red bold]WARNING: This action cannot be reversed![/red bold]")
-        
-        if not Confirm.ask("Are you ABSOLUTELY SURE you want to delete this?", default=False):
-            console.print("[yellow]Undo cancelled.[/yellow]")
-            conn.close()
+    console.print("\n[bold red]⚠️ UNDO LAST TRANSACTION[/bold red]")
+    
+    table = Table(box=box.HEAVY_EDGE, border_style="red")
+    table.add_column("Field", style="yellow")
+    table.add_column("Value", style="white")
+    
+    table.add_row("Date", f"{trans_date} {trans_time}")
+    table.add_row("User", trans_user)
+    table.add_row("Dimension", dimension)
+    table.add_row("Action", action)
+    table.add_row("Amount", f"{amount_kg:+.2f} kg")
+    table.add_row("Stock After", f"{current_stock:.2f} kg")
+    if notes:
+        table.add_row("Notes", notes)
+    
+    console.print(table)
+    console.print("\n[red bold]WARNING: This action cannot be reversed![/red bold]")
+    
+    if not Confirm.ask("Are you ABSOLUTELY SURE you want to delete this?", default=False):
+        console.print("[yellow]Undo cancelled.[/yellow]")
+        return
+    
+    # Create backup before deletion, regardless of the backup throttle
+    create_backup(force=True)
+    
+    # Delete the transaction and roll current_stock back to the previous row.
+    # The MAX(id) check makes sure nothing newer was written while confirming.
+    with conn:
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('''
+            DELETE FROM transactions
+            WHERE id = ? AND id = (SELECT MAX(id) FROM transactions)
+        ''', (trans_id,))
+        if cursor.rowcount == 0:
+            console.print("[yellow]Undo cancelled: a newer transaction was recorded meanwhile.[/yellow]")
             return
-    else:
-        print("\n--- UNDO LAST TRANSACTION ---")
-        print(f"Date: {trans_date} {trans_time}")
-        print(f"User: {trans_user}")
-        print(f"Dimension: {dimension}")
-        print(f"Action: {action}")
-        print(f"Amount: {amount_kg:+.2f} kg")
-        print(f"Stock After: {current_stock:.2f} kg")
         
-        confirm = input("\nAre you SURE? Type 'DELETE' to confirm: ")
-        if confirm != 'DELETE':
-            print("Undo cancelled.")
-            conn.close()
-            return
-    
-    # Create backup before deletion
-    create_backup()
+        cursor.execute('DELETE FROM current_stock WHERE dimension = ?', (dimension,))
+        cursor.execute('''
+            INSERT INTO current_stock (dimension, stock_kg, updated_at)
+            SELECT dimension, current_stock_kg, date || ' ' || time
+            FROM transactions
+            WHERE dimension = ?
+            ORDER BY id DESC
+            LIMIT 1
+        ''', (dimension,))
+        dimension_removed = cursor.rowcount == 0
     
-    # Delete the transaction
-    cursor.execute('DELETE FROM transactions WHERE id = ?', (trans_id,))
-    conn.commit()
-    conn.close()
+    if dimension_removed:
+        _KNOWN_DIMS.discard(dimension)
+        get_all_dimensions.cache_clear()
     
     console.print("[green]✅ Transaction deleted successfully.[/green]")
     console.print(f"[dim]Note: Stock level for '{dimension}' should be verified.[/dim]")
 
-def export_to_excel():
+def export_to_excel(conn=CONN):
     """Export database to Excel with multiple professional sheets."""
-    try:
-        from openpyxl import load_workbook
-        from openpyxl.styles import Font, PatternFill, Alignment
-        from openpyxl.utils.dataframe import dataframe_to_rows
-    except ImportError:
-        console.print("[yellow]Excel export requires openpyxl. Installing...[/yellow]")
-        os.system("pip install openpyxl")
+    if not OPENPYXL_AVAILABLE:
+        console.print("[yellow]Excel export requires openpyxl.[/yellow]")
+        console.print("[dim]Install it with: pip install openpyxl[/dim]")
         return
     
-    filename = f'inventory_report_{date.today().strftime("%Y%m%d_%H%M%S")}.xlsx'
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill, Alignment
+    from openpyxl.utils import get_column_letter
     
-    conn = sqlite3.connect(DB_NAME)
+    filename = f'inventory_report_{date.today().strftime("%Y%m%d_%H%M%S")}.xlsx'
+    currency = CONFIG["default_currency"]
     
     # Sheet 1: Current Stock Summary
     stock_query = '''
-        SELECT dimension, current_stock_kg as stock_kg
-        FROM transactions t1
-        WHERE id = (
-            SELECT MAX(id) 
-            FROM transactions t2 
-            WHERE t2.dimension = t1.dimension
-        )
+        SELECT dimension, stock_kg
+        FROM current_stock
         ORDER BY dimension
     '''
-    stock_df = pd.read_sql_query(stock_query, conn)
-    stock_df.columns = ['Dimension', 'Stock (kg)']
+    stock_rows = conn.execute(stock_query).fetchall()
+    stock_headers = ['Dimension', 'Stock (kg)']
     
     # Sheet 2: Transaction History
-    trans_df = pd.read_sql_query(
-        'SELECT date, time, user, dimension, action, amount_kg, current_stock_kg FROM transactions ORDER BY date DESC, time DESC', 
-        conn
-    )
-    trans_df.columns = ['Date', 'Time', 'User', 'Dimension', 'Action', 'Amount (kg)', 'Stock After (kg)']
+    trans_rows = conn.execute(
+        'SELECT date, time, user, dimension, action, amount_kg, current_stock_kg FROM transactions ORDER BY date DESC, time DESC'
+    ).fetchall()
+    trans_headers = ['Date', 'Time', 'User', 'Dimension', 'Action', 'Amount (kg)', 'Stock After (kg)']
     
     # Sheet 3: Sales by Dimension
     sales_query = '''
@@ -1250,97 +1350,104 @@ def export_to_excel():
         GROUP BY dimension
         ORDER BY total_sold DESC
     '''
-    sales_df = pd.read_sql_query(sales_query, conn)
-    sales_df.columns = ['Dimension', 'Num Sales', 'Total Sold (kg)', 'Avg Sale (kg)', f'Revenue ({CONFIG["default_currency"]})']
+    sales_rows = conn.execute(sales_query).fetchall()
+    sales_headers = ['Dimension', 'Num Sales', 'Total Sold (kg)', 'Avg Sale (kg)', f'Revenue ({currency})']
     
     # Sheet 4: Profit Analysis (if enabled)
-    profit_data = None
+    profit_rows = None
     if CONFIG['enable_profit_tracking']:
-        # Cost
-        cost_query = '''
-            SELECT dimension,
-                   SUM(ABS(amount_kg)) as qty_purchased,
-                   SUM(ABS(amount_kg) * cost_per_kg) as total_cost
-            FROM transactions
-            WHERE action = 'Stock Added' AND cost_per_kg > 0
-            GROUP BY dimension
-        '''
-        cost_df = pd.read_sql_query(cost_query, conn)
-        
-        # Revenue
-        revenue_query = '''
-            SELECT dimension,
-                   SUM(ABS(amount_kg)) as qty_sold,
-                   SUM(ABS(amount_kg) * sell_per_kg) as total_revenue
-            FROM transactions
-            WHERE action = 'Sale' AND sell_per_kg > 0
-            GROUP BY dimension
+        # Priced purchases and sales per dimension, with profit and margin
+        # worked out by SQLite; dimensions missing one side count as 0
+        profit_query = '''
+            SELECT dimension, qty_purchased, total_cost, qty_sold, total_revenue,
+                   total_revenue - total_cost as profit,
+                   CASE WHEN total_revenue > 0
+                        THEN (total_revenue - total_cost) * 100.0 / total_revenue
+                        ELSE 0 END as margin
+            FROM (
+                SELECT dimension,
+                       COALESCE(SUM(CASE WHEN action = 'Stock Added' THEN ABS(amount_kg) END), 0) as qty_purchased,
+                       COALESCE(SUM(CASE WHEN action = 'Stock Added' THEN ABS(amount_kg) * cost_per_kg END), 0) as total_cost,
+                       COALESCE(SUM(CASE WHEN action = 'Sale' THEN ABS(amount_kg) END), 0) as qty_sold,
+                       COALESCE(SUM(CASE WHEN action = 'Sale' THEN ABS(amount_kg) * sell_per_kg END), 0) as total_revenue
+                FROM transactions
+                WHERE (action = 'Stock Added' AND cost_per_kg > 0)
+                   OR (action = 'Sale' AND sell_per_kg > 0)
+                GROUP BY dimension
+            )
+            ORDER BY dimension
         '''
-        revenue_df = pd.read_sql_query(revenue_query, conn)
+        rows = conn.execute(profit_query).fetchall()
         
-        # Merge
-        if not cost_df.empty and not revenue_df.empty:
-            profit_df = pd.merge(cost_df, revenue_df, on='dimension', how='outer').fillna(0)
-            profit_df['profit'] = profit_df['total_revenue'] - profit_df['total_cost']
-            profit_df['margin_%'] = (profit_df['profit'] / profit_df['total_revenue'] * 100).fillna(0)
-            profit_df.columns = ['Dimension', 'Qty Purchased', f'Total Cost ({CONFIG["default_currency"]})', 
-                                'Qty Sold', f'Revenue ({CONFIG["default_currency"]})', 
-                                f'Profit ({CONFIG["default_currency"]})', 'Margin (%)']
-            profit_data = profit_df
-    
-    conn.close()
-    
-    # Write to Excel with multiple sheets
-    with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-        stock_df.to_excel(writer, sheet_name='Current Stock', index=False)
-        trans_df.to_excel(writer, sheet_name='Transaction History', index=False)
-        sales_df.to_excel(writer, sheet_name='Sales Summary', index=False)
-        if profit_data is not None:
-            profit_data.to_excel(writer, sheet_name='Profit Analysis', index=False)
-    
-    # Format the Excel file
-    wb = load_workbook(filename)
-    
-    # Format Current Stock sheet
-    ws = wb['Current Stock']
-    
-    # Header formatting
+        # Only worth a sheet when there are both priced purchases and sales
+        if any(row[1] for row in rows) and any(row[3] for row in rows):
+            profit_rows = rows
+    profit_headers = ['Dimension', 'Qty Purchased', f'Total Cost ({currency})', 
+                      'Qty Sold', f'Revenue ({currency})', 
+                      f'Profit ({currency})', 'Margin (%)']
+    
+    # Stream the workbook; write-only sheets need their column widths set
+    # before the first row is appended
+    wb = Workbook(write_only=True)
+    
+    def add_sheet(title, headers, rows):
+        ws = wb.create_sheet(title)
+        max_widths = [len(str(header)) for header in headers]
+        # Widths can't follow the append loop in write-only mode, so size the
+        # columns from a scan of the fetched rows before any are written
+        for row in rows:
+            for idx, value in enumerate(row):
+                if value is not None:
+                    width = len(str(value))
+                    if width > max_widths[idx]:
+                        max_widths[idx] = width
+        for idx, max_length in enumerate(max_widths, 1):
+            ws.column_dimensions[get_column_letter(idx)].width = min(max_length + 2, 50)
+        return ws
+    
+    # Current Stock sheet with header and stock level formatting
     header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
     header_font = Font(color='FFFFFF', bold=True)
+    header_alignment = Alignment(horizontal='center')
     
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal='center')
-    
-    # Color code stock levels
+    empty_fill = PatternFill(start_color='FF0000', end_color='FF0000', fill_type='solid')
+    empty_font = Font(color='FFFFFF', bold=True)
     low_fill = PatternFill(start_color='FFC7CE', end_color='FFC7CE', fill_type='solid')
     good_fill = PatternFill(start_color='C6EFCE', end_color='C6EFCE', fill_type='solid')
     
-    for row in range(2, ws.max_row + 1):
-        stock_value = ws.cell(row, 2).value
+    ws = add_sheet('Current Stock', stock_headers, stock_rows)
+    header = []
+    for title in stock_headers:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = header_alignment
+        header.append(cell)
+    ws.append(header)
+    
+    for dimension, stock_value in stock_rows:
+        cell = WriteOnlyCell(ws, value=stock_value)
         if stock_value is not None:
             if stock_value == 0:
-                ws.cell(row, 2).fill = PatternFill(start_color='FF0000', end_color='FF0000', fill_type='solid')
-                ws.cell(row, 2).font = Font(color='FFFFFF', bold=True)
+                cell.fill = empty_fill
+                cell.font = empty_font
             elif stock_value < CONFIG['low_stock_threshold']:
-                ws.cell(row, 2).fill = low_fill
+                cell.fill = low_fill
             else:
-                ws.cell(row, 2).fill = good_fill
-    
-    # Auto-adjust column widths
-    for ws in wb.worksheets:
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
+                cell.fill = good_fill
+        ws.append([dimension, cell])
+    
+    # Remaining sheets are written as plain rows
+    sheets = [('Transaction History', trans_headers, trans_rows),
+              ('Sales Summary', sales_headers, sales_rows)]
+    if profit_rows is not None:
+        sheets.append(('Profit Analysis', profit_headers, profit_rows))
+    
+    for title, headers, rows in sheets:
+        ws = add_sheet(title, headers, rows)
+        ws.append(headers)
+        for row in rows:
+            ws.append(row)
     
     wb.save(filename)
     
@@ -1349,90 +1456,73 @@ def export_to_excel():
 
 def edit_settings():
     """Edit configuration settings."""
-    if RICH_AVAILABLE:
-        console.print("\n[bold cyan]⚙️ Settings[/bold cyan]")
-        
-        table = Table(box=box.ROUNDED)
-        table.add_column("Setting", style="cyan")
-        table.add_column("Current Value", style="green")
-        
-        for key, value in CONFIG.items():
-            table.add_row(key, str(value))
+    console.print("\n[bold cyan]⚙️ Settings[/bold cyan]")
+    
+    table = Table(box=box.ROUNDED)
+    table.add_column("Setting", style="cyan")
+    table.add_column("Current Value", style="green")
+    
+    for key, value in CONFIG.items():
+        table.add_row(key, str(value))
+    
+    console.print(table)
+    
+    if Confirm.ask("\nEdit settings?", default=False):
+        CONFIG['low_stock_threshold'] = float(Prompt.ask(
+            "Low stock threshold (kg)", 
+            default=str(CONFIG['low_stock_threshold'])
+        ))
+        CONFIG['backups_to_keep'] = int(Prompt.ask(
+            "Number of backups to keep", 
+            default=str(CONFIG['backups_to_keep'])
+        ))
         
-        console.print(table)
-        
-        if Confirm.ask("\nEdit settings?", default=False):
-            CONFIG['low_stock_threshold'] = float(Prompt.ask(
-                "Low stock threshold (kg)", 
-                default=str(CONFIG['low_stock_threshold'])
-            ))
-            CONFIG['backups_to_keep'] = int(Prompt.ask(
-                "Number of backups to keep", 
-                default=str(CONFIG['backups_to_keep'])
-            ))
-            
-            save_config(CONFIG)
-            console.print("[green]✅ Settings saved![/green]")
+        save_config(CONFIG)
+        console.print("[green]✅ Settings saved![/green]")
+
+# Static part of the main menu, parsed once; main_menu adds the user/date header.
+# render_str applies markup and highlighting exactly as console.print would
+MENU_OPTIONS = Group(*(console.render_str(line) for line in (
+    "\n[bold]📦 Stock Operations:[/bold]",
+    "  [cyan]1.[/cyan] Add New Stock (Today)",
+    "  [cyan]2.[/cyan] Record Sale (Today)",
+    
+    "\n[bold]⏰ Past Transactions:[/bold]",
+    "  [cyan]3.[/cyan] Add Past Transaction (Manual Entry)",
+    "  [cyan]4.[/cyan] Bulk Entry Wizard (Multiple Past Transactions)",
+    
+    "\n[bold]📊 Reports & Views:[/bold]",
+    "  [cyan]5.[/cyan] View Current Inventory",
+    "  [cyan]6.[/cyan] View Item History",
+    "  [cyan]7.[/cyan] Sales & Profit Reports",
+    "  [cyan]8.[/cyan] Generate Stock Chart",
+    
+    "\n[bold]🔧 Management:[/bold]",
+    "  [cyan]9.[/cyan] Stock Adjustment (Physical Count)",
+    "  [cyan]10.[/cyan] Undo Last Transaction",
+    "  [cyan]11.[/cyan] Export to Excel",
+    "  [cyan]12.[/cyan] Settings",
+    "  [cyan]0.[/cyan] Exit",
+)))
 
 def main_menu():
     """Display main menu and handle user choice."""
     user = get_user_name()
     
     while True:
-        if RICH_AVAILABLE:
-            console.print("\n" + "="*60)
-            console.print(Panel.fit(
+        console.print(Group(
+            "\n" + "="*60,
+            Panel.fit(
                 "[bold cyan]BIODEGRADABLE BAGS INVENTORY SYSTEM[/bold cyan]\n"
                 f"[dim]User: {user} | Date: {date.today().strftime('%d %B %Y')}[/dim]",
                 border_style="cyan"
-            ))
-            console.print("="*60)
-            
-            console.print("\n[bold]📦 Stock Operations:[/bold]")
-            console.print("  [cyan]1.[/cyan] Add New Stock (Today)")
-            console.print("  [cyan]2.[/cyan] Record Sale (Today)")
-            
-            console.print("\n[bold]⏰ Past Transactions:[/bold]")
-            console.print("  [cyan]3.[/cyan] Add Past Transaction (Manual Entry)")
-            console.print("  [cyan]4.[/cyan] Bulk Entry Wizard (Multiple Past Transactions)")
-            
-            console.print("\n[bold]📊 Reports & Views:[/bold]")
-            console.print("  [cyan]5.[/cyan] View Current Inventory")
-            console.print("  [cyan]6.[/cyan] View Item History")
-            console.print("  [cyan]7.[/cyan] Sales & Profit Reports")
-            console.print("  [cyan]8.[/cyan] Generate Stock Chart")
-            
-            console.print("\n[bold]🔧 Management:[/bold]")
-            console.print("  [cyan]9.[/cyan] Stock Adjustment (Physical Count)")
-            console.print("  [cyan]10.[/cyan] Undo Last Transaction")
-            console.print("  [cyan]11.[/cyan] Export to Excel")
-            console.print("  [cyan]12.[/cyan] Settings")
-            console.print("  [cyan]0.[/cyan] Exit")
-            
-            choice = Prompt.ask("\nEnter your choice", 
-                              choices=['1','2','3','4','5','6','7','8','9','10','11','12','0'])
-        else:
-            print("\n" + "="*50)
-            print("INVENTORY SYSTEM - MAIN MENU")
-            print("="*50)
-            print("\nStock Operations:")
-            print("1. Add New Stock (Today)")
-            print("2. Record Sale (Today)")
-            print("\nPast Transactions:")
-            print("3. Add Past Transaction")
-            print("4. Bulk Entry Wizard")
-            print("\nReports:")
-            print("5. View Current Inventory")
-            print("6. View Item History")
-            print("7. Sales & Profit Reports")
-            print("8. Generate Stock Chart")
-            print("\nManagement:")
-            print("9. Stock Adjustment")
-            print("10. Undo Last Transaction")
-            print("11. Export to Excel")
-            print("12. Settings")
-            print("0. Exit")
-            choice = input("\nChoice: ").strip()
+            ),
+            "="*60,
+            MENU_OPTIONS
+        ))
+        
+        choice = Prompt.ask("\nEnter your choice", 
+                          choices=['1','2','3','4','5','6','7','8','9','10','11','12','0'])
         
         try:
             if choice == '1':
@@ -1460,21 +1550,15 @@ def main_menu():
             elif choice == '12':
                 edit_settings()
             elif choice == '0':
-                if RICH_AVAILABLE:
-                    console.print("\n[green]💾 All data saved automatically![/green]")
-                    console.print("[cyan]👋 Goodbye![/cyan]")
-                else:
-                    print("\n✓ Data saved. Goodbye!")
+                console.print("\n[green]💾 All data saved automatically![/green]")
+                console.print("[cyan]👋 Goodbye![/cyan]")
                 break
             else:
                 console.print("[red]Invalid choice.[/red]")
         
         except KeyboardInterrupt:
             console.print("\n\n[yellow]⚠️ Interrupted by user[/yellow]")
-            if RICH_AVAILABLE:
-                if Confirm.ask("Exit program?", default=False):
-                    break
-            else:
+            if Confirm.ask("Exit program?", default=False):
                 break
         except Exception as e:
             log_error(f"Error in menu option {choice}: {str(e)}")
@@ -1484,42 +1568,26 @@ def main_menu():
 def main():
     """Main entry point."""
     try:
-        # Check if rich is available
-        if not RICH_AVAILABLE:
-            print("Installing required libraries...")
-            os.system("pip install rich matplotlib")
-            print("\nPlease restart the program.")
-            return
-        
-        # Initialize database
-        if not os.path.exists(DB_NAME):
+        # Initialize database (CONN has already created the file)
+        if not CONN.execute("SELECT 1 FROM sqlite_master WHERE name = 'transactions'").fetchone():
             console.print("[yellow]Initializing new database...[/yellow]")
             init_database()
             console.print("[green]✓ Database created successfully![/green]")
         else:
             init_database()  # Ensure tables exist
         
-        # Check for low stock on startup
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM transactions')
-        count = cursor.fetchone()[0]
-        conn.close()
+        # Check for low stock on startup (an empty database simply has no rows)
+        low_stock_items = CONN.execute('''
+            SELECT dimension, stock_kg
+            FROM current_stock
+            WHERE stock_kg > 0 AND stock_kg < ?
+            ORDER BY dimension
+        ''', (CONFIG['low_stock_threshold'],)).fetchall()
         
-        if count > 0:
-            # Show low stock alerts
-            dimensions = get_all_dimensions()
-            low_stock_items = []
-            
-            for dim in dimensions:
-                stock = get_current_stock(dim)
-                if 0 < stock < CONFIG['low_stock_threshold']:
-                    low_stock_items.append((dim, stock))
-            
-            if low_stock_items:
-                console.print("\n[bold red]⚠️ LOW STOCK ALERTS:[/bold red]")
-                for dim, stock in low_stock_items:
-                    console.print(f"  [yellow]• {dim}: Only {stock:.2f} kg remaining[/yellow]")
+        if low_stock_items:
+            console.print("\n[bold red]⚠️ LOW STOCK ALERTS:[/bold red]")
+            for dim, stock in low_stock_items:
+                console.print(f"  [yellow]• {dim}: Only {stock:.2f} kg remaining[/yellow]")
         
         # Run main menu
         main_menu()